@@ -1,5 +1,14 @@
 import os
-from flask import Flask, request, jsonify, send_from_directory, send_file
+import sys
+import json
+import time
+import uuid
+import queue
+import random
+import atexit
+import logging
+import logging.handlers
+from flask import Flask, request, jsonify, send_from_directory, send_file, g, has_request_context
 from flask_cors import CORS
 import psycopg
 from psycopg.rows import dict_row
@@ -25,99 +34,311 @@ DATABASE_URL = os.getenv('DATABASE_URL',
 # Date limite du vote (21 décembre 2025, 00h15, heure du Cameroun - UTC+1)
 VOTE_DEADLINE = datetime(2025, 12, 21, 00, 15, 0)  # 00h15 heure Cameroun
 
-# ========== FONCTION D'INITIALISATION ==========
-def init_database():
-    """Initialise la base de données"""
+# Journalisation : niveau minimal et taux d'échantillonnage des requêtes réussies
+# sur les routes à fort volume (images, fichiers statiques). 1.0 = tout journaliser.
+# Une valeur invalide ne doit pas empêcher les workers de démarrer : on revient
+# à la valeur par défaut et l'avertissement est journalisé une fois le logger prêt.
+_config_warnings = []
+
+LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO').upper()
+if not isinstance(logging.getLevelName(LOG_LEVEL), int):
+    _config_warnings.append(f"LOG_LEVEL invalide ({LOG_LEVEL!r}), INFO utilisé")
+    LOG_LEVEL = 'INFO'
+
+try:
+    LOG_SAMPLE_RATE = float(os.getenv('LOG_SAMPLE_RATE', '0.1'))
+except ValueError:
+    LOG_SAMPLE_RATE = None
+if LOG_SAMPLE_RATE is None or not 0.0 <= LOG_SAMPLE_RATE <= 1.0:
+    _config_warnings.append(f"LOG_SAMPLE_RATE invalide ({os.getenv('LOG_SAMPLE_RATE')!r}), 0.1 utilisé")
+    LOG_SAMPLE_RATE = 0.1
+# Durée de vie (secondes) du cache des candidats : chaque worker garde sa propre
+# copie, les votes validés par un autre worker y apparaissent donc après ce délai.
+try:
+    CANDIDATES_CACHE_TTL = float(os.getenv('CANDIDATES_CACHE_TTL', '10'))
+except ValueError:
+    CANDIDATES_CACHE_TTL = None
+if CANDIDATES_CACHE_TTL is None or not CANDIDATES_CACHE_TTL >= 0:
+    _config_warnings.append(f"CANDIDATES_CACHE_TTL invalide ({os.getenv('CANDIDATES_CACHE_TTL')!r}), 10 utilisé")
+    CANDIDATES_CACHE_TTL = 10.0
+
+SAMPLED_ENDPOINTS = {'serve_image', 'serve_image_old', 'serve_index', 'serve_static'}
+
+# ========== JOURNALISATION ==========
+class JsonFormatter(logging.Formatter):
+    """Formate chaque enregistrement en une ligne JSON"""
+
+    def format(self, record):
+        # Les champs libres d'abord : ils ne doivent jamais écraser les clés réservées
+        entry = dict(getattr(record, 'fields', {}))
+        entry.update({
+            'ts': datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+            'request_id': getattr(record, 'request_id', None),
+        })
+        if record.exc_info:
+            entry['exc_info'] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+class RequestIdFilter(logging.Filter):
+    """Ajoute l'identifiant de la requête courante à chaque enregistrement"""
+
+    def filter(self, record):
+        record.request_id = g.get('request_id') if has_request_context() else None
+        return True
+
+# Le formatage JSON se fait dans le thread de la requête (le contexte Flask y est
+# disponible) ; seule l'écriture sur stdout est déléguée au thread d'écoute.
+_queue_handler = logging.handlers.QueueHandler(queue.SimpleQueue())
+_queue_handler.setFormatter(JsonFormatter())
+_queue_handler.addFilter(RequestIdFilter())
+_log_listener = None
+
+def _start_log_listener():
+    """Démarre (ou redémarre autour d'un fork) le thread d'écriture des logs"""
+    global _log_listener
+    if _log_listener is None:
+        _log_listener = logging.handlers.QueueListener(_queue_handler.queue, logging.StreamHandler(sys.stdout))
+        _log_listener.start()
+
+def _stop_log_listener():
+    """Vide la file d'attente et arrête le thread d'écriture"""
+    global _log_listener
+    if _log_listener is not None:
+        _log_listener.stop()
+        _log_listener = None
+
+def _restart_log_listener_in_child():
+    """Relance le thread dans un worker, sur une file neuve : les
+    enregistrements encore en attente appartiennent au processus parent"""
+    _queue_handler.queue = queue.SimpleQueue()
+    _start_log_listener()
+
+logger = logging.getLogger('election')
+logger.setLevel(LOG_LEVEL)
+logger.addHandler(_queue_handler)
+logger.propagate = False
+
+_start_log_listener()
+atexit.register(_stop_log_listener)
+# Les threads ne survivent pas au fork des workers gunicorn (preload_app) :
+# le thread est arrêté avant le fork pour qu'aucune écriture sur stdout ne soit
+# en cours (verrou hérité par l'enfant), puis relancé des deux côtés.
+os.register_at_fork(
+    before=_stop_log_listener,
+    after_in_parent=_start_log_listener,
+    after_in_child=_restart_log_listener_in_child,
+)
+
+for _warning in _config_warnings:
+    logger.warning(_warning)
+
+@app.before_request
+def start_request_timer():
+    """Attribue un identifiant à la requête et démarre le chronomètre"""
+    incoming_id = request.headers.get('X-Request-ID', '')
+    g.request_id = incoming_id if 0 < len(incoming_id) <= 128 else uuid.uuid4().hex
+    g.start_time = time.perf_counter()
+
+@app.after_request
+def log_request(response):
+    """Journalise la requête terminée et renvoie son identifiant au client"""
+    request_id = g.get('request_id') or uuid.uuid4().hex
+    response.headers['X-Request-ID'] = request_id
+    duration_ms = round((time.perf_counter() - g.get('start_time', time.perf_counter())) * 1000, 2)
+    status = response.status_code
     
-    print("🔧 Initialisation de la base de données...")
+    # Échantillonner les succès des routes à fort volume
+    if status < 400 and request.endpoint in SAMPLED_ENDPOINTS and random.random() >= LOG_SAMPLE_RATE:
+        return response
     
+    if status >= 500:
+        level = logging.ERROR
+    elif status >= 400:
+        level = logging.WARNING
+    else:
+        level = logging.INFO
+    
+    logger.log(level, 'Requête traitée', extra={'fields': {
+        'method': request.method,
+        'path': request.path,
+        'endpoint': request.endpoint,
+        'status': status,
+        'duration_ms': duration_ms,
+    }})
+    return response
+
+# ========== MIGRATIONS ==========
+# Chaque étape du schéma est appliquée une seule fois et enregistrée dans
+# schema_version. Ne jamais modifier une migration publiée : en ajouter une nouvelle.
+MIGRATIONS = [
+    (1, "Table candidates", [
+        """
+        CREATE TABLE IF NOT EXISTS candidates (
+            id VARCHAR(50) PRIMARY KEY,
+            nom VARCHAR(100) NOT NULL,
+            categorie VARCHAR(20) CHECK (categorie IN ('miss', 'mister')),
+            img VARCHAR(255),
+            votes INTEGER DEFAULT 0,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        """,
+    ]),
+    (2, "Table transactions", [
+        """
+        CREATE TABLE IF NOT EXISTS transactions (
+            id SERIAL PRIMARY KEY,
+            candidate_id VARCHAR(50) NOT NULL,
+            methode_paiement VARCHAR(50) NOT NULL,
+            code_transaction VARCHAR(100) NOT NULL,
+            code_transaction_normalized VARCHAR(100) GENERATED ALWAYS AS (UPPER(code_transaction)) STORED,
+            nombre_votes INTEGER NOT NULL,
+            statut VARCHAR(20) DEFAULT 'pending' CHECK (statut IN ('pending', 'validated', 'rejected')),
+            montant INTEGER NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            validated_at TIMESTAMP,
+            FOREIGN KEY (candidate_id) REFERENCES candidates(id) ON DELETE CASCADE,
+            CONSTRAINT unique_code_transaction_normalized UNIQUE (code_transaction_normalized)
+        )
+        """,
+    ]),
+    (3, "Indexes transactions", [
+        "CREATE INDEX IF NOT EXISTS idx_transactions_code_normalized ON transactions(code_transaction_normalized)",
+        "CREATE INDEX IF NOT EXISTS idx_transactions_status ON transactions(statut)",
+        "CREATE INDEX IF NOT EXISTS idx_transactions_candidate ON transactions(candidate_id)",
+    ]),
+    (4, "Candidats par défaut", [
+        # Uniquement si la table est vide (bases créées avant les migrations)
+        """
+        INSERT INTO candidates (id, nom, categorie, img)
+        SELECT * FROM (VALUES
+            ('miss1', 'LOVE NDAZOO', 'miss', 'miss_1.jpg'),
+            ('miss2', 'KERENA KENNE', 'miss', 'miss_2.jpg'),
+            ('miss3', 'DIVINE ZEKENG', 'miss', 'miss_3.jpg'),
+            ('miss4', 'HILARY TCHEUNDEM', 'miss', 'miss_4.jpg'),
+            ('miss5', 'ANUARITE DOUNANG', 'miss', 'miss_5.jpg'),
+            ('mister1', 'ULYSSE ZELEF', 'mister', 'mass_1.jpg'),
+            ('mister2', 'DOMINIQUE MBOAPFOURI', 'mister', 'mass_2.jpg'),
+            ('mister3', 'ULRICH MBAKONG', 'mister', 'mass_3.jpg'),
+            ('mister4', 'JORDAN BIAS', 'mister', 'mass_4.jpg'),
+            ('mister5', 'OREL BEYALA', 'mister', 'mass_5.jpg'),
+            ('mister6', 'WILFRIED BUGUEM', 'mister', 'mass_6.jpg'),
+            ('mister7', 'PRINCELY NZO', 'mister', 'mass_7.jpg'),
+            ('mister8', 'JOHANNES ELANGA', 'mister', 'mass_8.jpg')
+        ) AS defaults (id, nom, categorie, img)
+        WHERE NOT EXISTS (SELECT 1 FROM candidates)
+        """,
+    ]),
+    (5, "Correction des chemins d'images", [
+        """
+        UPDATE candidates 
+        SET img = REPLACE(img, 'Photo/', '')
+        WHERE img LIKE 'Photo/%'
+        """,
+    ]),
+]
+SCHEMA_VERSION = MIGRATIONS[-1][0]
+
+# Clé du verrou consultatif Postgres partagé par tous les workers
+MIGRATION_LOCK_ID = 20251221
+# Attente maximale du verrou (secondes) ; au-delà, le démarrage échoue au lieu
+# de bloquer le processus maître indéfiniment
+MIGRATION_LOCK_WAIT = 60
+# Une instruction de migration bloquée derrière un verrou de table abandonne
+MIGRATION_LOCK_TIMEOUT = '30s'
+
+def get_schema_version(cur):
+    """Retourne la dernière version appliquée (0 si aucune)
+
+    La connexion doit être en autocommit : l'erreur d'une table absente
+    n'interrompt alors aucune transaction.
+    """
     try:
-        conn = psycopg.connect(DATABASE_URL, row_factory=dict_row)
+        cur.execute("SELECT COALESCE(MAX(version), 0) AS version FROM schema_version")
+    except psycopg.errors.UndefinedTable:
+        return 0
+    return cur.fetchone()['version']
+
+def run_migrations():
+    """Applique les migrations en attente et retourne leur nombre"""
+    with psycopg.connect(DATABASE_URL, row_factory=dict_row, autocommit=True) as conn:
         cur = conn.cursor()
         
-        # 1. Créer la table candidates
-        cur.execute("""
-            CREATE TABLE IF NOT EXISTS candidates (
-                id VARCHAR(50) PRIMARY KEY,
-                nom VARCHAR(100) NOT NULL,
-                categorie VARCHAR(20) CHECK (categorie IN ('miss', 'mister')),
-                img VARCHAR(255),
-                votes INTEGER DEFAULT 0,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        """)
-        print("✅ Table 'candidates' vérifiée/créée")
-        
-        # 2. Créer la table transactions
-        cur.execute("""
-            CREATE TABLE IF NOT EXISTS transactions (
-                id SERIAL PRIMARY KEY,
-                candidate_id VARCHAR(50) NOT NULL,
-                methode_paiement VARCHAR(50) NOT NULL,
-                code_transaction VARCHAR(100) NOT NULL,
-                code_transaction_normalized VARCHAR(100) GENERATED ALWAYS AS (UPPER(code_transaction)) STORED,
-                nombre_votes INTEGER NOT NULL,
-                statut VARCHAR(20) DEFAULT 'pending' CHECK (statut IN ('pending', 'validated', 'rejected')),
-                montant INTEGER NOT NULL,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                validated_at TIMESTAMP,
-                FOREIGN KEY (candidate_id) REFERENCES candidates(id) ON DELETE CASCADE,
-                CONSTRAINT unique_code_transaction_normalized UNIQUE (code_transaction_normalized)
-            )
-        """)
-        print("✅ Table 'transactions' vérifiée/créée")
+        # Chemin rapide : schéma à jour, une seule requête et pas de verrou
+        if get_schema_version(cur) >= SCHEMA_VERSION:
+            return 0
         
-        # 3. Créer les indexes
-        cur.execute("CREATE INDEX IF NOT EXISTS idx_transactions_code_normalized ON transactions(code_transaction_normalized)")
-        cur.execute("CREATE INDEX IF NOT EXISTS idx_transactions_status ON transactions(statut)")
-        cur.execute("CREATE INDEX IF NOT EXISTS idx_transactions_candidate ON transactions(candidate_id)")
-        print("✅ Indexes vérifiés/créés")
-        
-        # 4. Vérifier si des candidats existent déjà
-        cur.execute("SELECT COUNT(*) FROM candidates")
-        count = cur.fetchone()['count']
+        cur.execute("SELECT set_config('lock_timeout', %s, false)", (MIGRATION_LOCK_TIMEOUT,))
+        deadline = time.monotonic() + MIGRATION_LOCK_WAIT
+        while True:
+            cur.execute("SELECT pg_try_advisory_lock(%s) AS locked", (MIGRATION_LOCK_ID,))
+            if cur.fetchone()['locked']:
+                break
+            if time.monotonic() >= deadline:
+                raise RuntimeError(f"Verrou de migration non obtenu après {MIGRATION_LOCK_WAIT} s")
+            time.sleep(0.5)
         
-        if count == 0:
-            # Insérer les candidats par défaut avec correction des chemins
-            cur.execute("""
-                INSERT INTO candidates (id, nom, categorie, img) VALUES
-                ('miss1', 'LOVE NDAZOO', 'miss', 'miss_1.jpg'),
-                ('miss2', 'KERENA KENNE', 'miss', 'miss_2.jpg'),
-                ('miss3', 'DIVINE ZEKENG', 'miss', 'miss_3.jpg'),
-                ('miss4', 'HILARY TCHEUNDEM', 'miss', 'miss_4.jpg'),
-                ('miss5', 'ANUARITE DOUNANG', 'miss', 'miss_5.jpg'),
-                ('mister1', 'ULYSSE ZELEF', 'mister', 'mass_1.jpg'),
-                ('mister2', 'DOMINIQUE MBOAPFOURI', 'mister', 'mass_2.jpg'),
-                ('mister3', 'ULRICH MBAKONG', 'mister', 'mass_3.jpg'),
-                ('mister4', 'JORDAN BIAS', 'mister', 'mass_4.jpg'),
-                ('mister5', 'OREL BEYALA', 'mister', 'mass_5.jpg'),
-                ('mister6', 'WILFRIED BUGUEM', 'mister', 'mass_6.jpg'),
-                ('mister7', 'PRINCELY NZO', 'mister', 'mass_7.jpg'),
-                ('mister8', 'JOHANNES ELANGA', 'mister', 'mass_8.jpg')
-            """)
-            print(f"✅ {cur.rowcount} candidats insérés par défaut")
-        else:
-            # Corriger les chemins existants si nécessaire
+        try:
             cur.execute("""
-                UPDATE candidates 
-                SET img = REPLACE(img, 'Photo/', '')
-                WHERE img LIKE 'Photo/%'
+                CREATE TABLE IF NOT EXISTS schema_version (
+                    version INTEGER PRIMARY KEY,
+                    description VARCHAR(255) NOT NULL,
+                    applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )
             """)
-            if cur.rowcount > 0:
-                print(f"✅ {cur.rowcount} chemins d'images corrigés")
+            # Relire sous le verrou : un autre worker a pu migrer entre-temps
+            current = get_schema_version(cur)
+            applied = 0
             
-            print(f"✅ {count} candidats existent déjà")
-        
-        conn.commit()
-        print("🎉 Initialisation terminée avec succès !")
+            for version, description, statements in MIGRATIONS:
+                if version <= current:
+                    continue
+                with conn.transaction():
+                    for statement in statements:
+                        cur.execute(statement)
+                    cur.execute(
+                        "INSERT INTO schema_version (version, description) VALUES (%s, %s)",
+                        (version, description)
+                    )
+                logger.info("Migration appliquée", extra={'fields': {'version': version, 'description': description}})
+                applied += 1
+            
+            return applied
+        finally:
+            # Ne pas masquer l'erreur de migration : une session coupée libère
+            # de toute façon le verrou
+            try:
+                cur.execute("SELECT pg_advisory_unlock(%s)", (MIGRATION_LOCK_ID,))
+            except Exception:
+                logger.warning("Libération du verrou de migration impossible", exc_info=True)
+
+# ========== FONCTION D'INITIALISATION ==========
+def init_database():
+    """Met le schéma de la base de données à jour"""
+    try:
+        applied = run_migrations()
+        logger.info("Schéma à jour", extra={'fields': {'version': SCHEMA_VERSION, 'applied': applied}})
         return True
-        
-    except Exception as e:
-        print(f"❌ Erreur lors de l'initialisation: {e}")
+    except Exception:
+        logger.exception("Erreur lors de l'initialisation")
         return False
-    finally:
-        if 'conn' in locals():
-            conn.close()
+
+_schema_ready = False
+
+def ensure_schema():
+    """Relance les migrations si la dernière tentative de ce processus a échoué
+
+    Appelé par gunicorn dans chaque worker (post_worker_init) : avec preload_app,
+    le maître ne tente les migrations qu'une fois. Lève RuntimeError si elles
+    échouent encore, ce qui empêche le worker de démarrer.
+    """
+    global _schema_ready
+    if not _schema_ready:
+        _schema_ready = init_database()
+        if not _schema_ready:
+            raise RuntimeError("Migrations impossibles : schéma non à jour")
 
 # ========== FONCTION PRINCIPALE DE CONNEXION ==========
 def get_db():
@@ -125,10 +346,86 @@ def get_db():
     try:
         conn = psycopg.connect(DATABASE_URL, row_factory=dict_row)
         return conn
-    except Exception as e:
-        print(f"Erreur de connexion à la base de données: {e}")
+    except Exception:
+        logger.exception("Erreur de connexion à la base de données")
         raise
 
+# ========== CACHES ==========
+PHOTO_DIR = Path(__file__).parent.absolute() / 'static' / 'photo'
+
+_image_manifest = None
+_candidates_cache = {'rows': None, 'loaded_at': 0.0}
+
+def load_image_manifest():
+    """Indexe les fichiers de premier niveau de static/photo
+
+    Les sous-dossiers et les photos ajoutées après le démarrage ne figurent pas
+    dans le manifeste : serve_image les cherche alors sur le disque.
+    """
+    global _image_manifest
+    if PHOTO_DIR.exists():
+        _image_manifest = {f.name for f in PHOTO_DIR.iterdir() if f.is_file()}
+    else:
+        _image_manifest = set()
+    return _image_manifest
+
+def find_photo_on_disk(filename):
+    """Chemin d'une photo absente du manifeste, limité à static/photo"""
+    photo_dir = PHOTO_DIR.resolve()
+    file_path = (photo_dir / filename).resolve()
+    if file_path.is_relative_to(photo_dir) and file_path.is_file():
+        return file_path
+    return None
+
+def get_cached_candidates():
+    """Liste des candidats triée par catégorie et numéro"""
+    # Lecture unique du cache : une invalidation concurrente ne doit pas
+    # nous faire renvoyer None
+    now = time.monotonic()
+    rows = _candidates_cache['rows']
+    if rows is None or now - _candidates_cache['loaded_at'] > CANDIDATES_CACHE_TTL:
+        conn = get_db()
+        try:
+            cur = conn.cursor()
+            cur.execute("""
+                SELECT *, 
+                       CAST(REGEXP_REPLACE(id, '[^0-9]', '', 'g') AS INTEGER) as candidate_number
+                FROM candidates 
+                ORDER BY categorie, candidate_number
+            """)
+            rows = cur.fetchall()
+            _candidates_cache['rows'] = rows
+            _candidates_cache['loaded_at'] = now
+        finally:
+            conn.close()
+    return rows
+
+def invalidate_candidates_cache():
+    """Force le rechargement des candidats à la prochaine lecture"""
+    _candidates_cache['rows'] = None
+
+def warm_caches():
+    """Précharge le manifeste des images et la liste des candidats"""
+    images = load_image_manifest()
+    candidates = get_cached_candidates()
+    logger.info("Caches préchauffés", extra={'fields': {
+        'images': len(images),
+        'candidates': len(candidates),
+    }})
+
+def bootstrap():
+    """Migrations puis préchauffage des caches, une fois par processus chargeant l'app"""
+    global _schema_ready
+    start = time.perf_counter()
+    _schema_ready = init_database()
+    try:
+        warm_caches()
+    except Exception:
+        logger.exception("Échec du préchauffage des caches")
+    logger.info("Démarrage terminé", extra={'fields': {
+        'duration_ms': round((time.perf_counter() - start) * 1000, 2),
+    }})
+
 # ========== GESTIONNAIRES D'ERREURS ==========
 @app.errorhandler(404)
 def not_found(error):
@@ -140,47 +437,25 @@ def server_error(error):
 
 @app.errorhandler(Exception)
 def handle_exception(error):
-    print(f"Erreur non gérée: {error}")
+    logger.exception("Erreur non gérée")
     return jsonify({'error': 'Erreur interne du serveur'}), 500
 
 # ========== ROUTES API ==========
 @app.route('/api/candidates', methods=['GET'])
 def get_candidates():
     try:
-        conn = get_db()
-        cur = conn.cursor()
-        cur.execute("""
-            SELECT *, 
-                   CAST(REGEXP_REPLACE(id, '[^0-9]', '', 'g') AS INTEGER) as candidate_number
-            FROM candidates 
-            ORDER BY categorie, candidate_number
-        """)
-        candidates = cur.fetchall()
-        cur.close()
-        conn.close()
-        return jsonify(candidates)
-    except Exception as e:
-        print(f"Erreur dans get_candidates: {e}")
+        return jsonify(get_cached_candidates())
+    except Exception:
+        logger.exception("Erreur dans get_candidates")
         return jsonify({'error': 'Erreur de connexion à la base de données'}), 500
     
 @app.route('/api/candidates/<categorie>', methods=['GET'])
 def get_candidates_by_category(categorie):
     try:
-        conn = get_db()
-        cur = conn.cursor()
-        cur.execute("""
-            SELECT *, 
-                   CAST(REGEXP_REPLACE(id, '[^0-9]', '', 'g') AS INTEGER) as candidate_number
-            FROM candidates 
-            WHERE categorie = %s 
-            ORDER BY candidate_number
-        """, (categorie,))
-        candidates = cur.fetchall()
-        cur.close()
-        conn.close()
+        candidates = [c for c in get_cached_candidates() if c['categorie'] == categorie]
         return jsonify(candidates)
-    except Exception as e:
-        print(f"Erreur dans get_candidates_by_category: {e}")
+    except Exception:
+        logger.exception("Erreur dans get_candidates_by_category")
         return jsonify({'error': 'Erreur de connexion à la base de données'}), 500
 
 @app.route('/api/vote', methods=['POST'])
@@ -245,7 +520,7 @@ def submit_vote():
         }), 201
         
     except Exception as e:
-        print(f"Erreur dans submit_vote: {e}")
+        logger.exception("Erreur dans submit_vote")
         if 'conn' in locals():
             conn.rollback()
         return jsonify({'error': f'Erreur: {str(e)}'}), 500
@@ -279,8 +554,8 @@ def check_transaction_code(code):
                 'exists': False
             })
             
-    except Exception as e:
-        print(f"Erreur dans check_transaction_code: {e}")
+    except Exception:
+        logger.exception("Erreur dans check_transaction_code")
         return jsonify({'error': 'Erreur de vérification'}), 500
 
 @app.route('/api/admin/login', methods=['POST'])
@@ -314,8 +589,8 @@ def get_pending_transactions():
         cur.close()
         conn.close()
         return jsonify(transactions)
-    except Exception as e:
-        print(f"Erreur dans get_pending_transactions: {e}")
+    except Exception:
+        logger.exception("Erreur dans get_pending_transactions")
         return jsonify({'error': 'Erreur de connexion à la base de données'}), 500
 
 @app.route('/api/admin/transactions/<int:transaction_id>/validate', methods=['POST'])
@@ -335,12 +610,13 @@ def validate_transaction(transaction_id):
         cur.execute("UPDATE candidates SET votes = votes + %s WHERE id = %s", (vote_count, candidate_id))
         cur.execute("UPDATE transactions SET statut = 'validated', validated_at = %s WHERE id = %s", (datetime.now(), transaction_id))
         conn.commit()
+        invalidate_candidates_cache()
         
         cur.close()
         conn.close()
         return jsonify({'message': 'Transaction validée'}), 200
-    except Exception as e:
-        print(f"Erreur dans validate_transaction: {e}")
+    except Exception:
+        logger.exception("Erreur dans validate_transaction")
         if 'conn' in locals():
             conn.rollback()
         return jsonify({'error': 'Erreur de connexion à la base de données'}), 500
@@ -356,8 +632,8 @@ def reject_transaction(transaction_id):
         cur.close()
         conn.close()
         return jsonify({'message': 'Transaction rejetée'}), 200
-    except Exception as e:
-        print(f"Erreur dans reject_transaction: {e}")
+    except Exception:
+        logger.exception("Erreur dans reject_transaction")
         if 'conn' in locals():
             conn.rollback()
         return jsonify({'error': 'Erreur de connexion à la base de données'}), 500
@@ -378,8 +654,8 @@ def get_ranking():
         cur.close()
         conn.close()
         return jsonify(ranking)
-    except Exception as e:
-        print(f"Erreur dans get_ranking: {e}")
+    except Exception:
+        logger.exception("Erreur dans get_ranking")
         return jsonify({'error': 'Erreur de connexion à la base de données'}), 500
 
 @app.route('/api/ranking/<categorie>', methods=['GET'])
@@ -403,8 +679,8 @@ def get_ranking_by_category(categorie):
         cur.close()
         conn.close()
         return jsonify(ranking)
-    except Exception as e:
-        print(f"Erreur dans get_ranking_by_category: {e}")
+    except Exception:
+        logger.exception("Erreur dans get_ranking_by_category")
         return jsonify({'error': 'Erreur de connexion à la base de données'}), 500
 
 @app.route('/api/stats', methods=['GET'])
@@ -440,8 +716,8 @@ def get_stats():
             'time_remaining': time_remaining,
             'vote_active': time_remaining > 0
         })
-    except Exception as e:
-        print(f"Erreur dans get_stats: {e}")
+    except Exception:
+        logger.exception("Erreur dans get_stats")
         return jsonify({'error': 'Erreur de connexion à la base de données'}), 500
 
 @app.route('/api/deadline', methods=['GET'])
@@ -487,6 +763,7 @@ def health_check():
             'test_result': result
         }), 200
     except Exception as e:
+        logger.exception("Erreur dans health_check")
         return jsonify({
             'status': 'unhealthy', 
             'database': 'disconnected', 
@@ -552,6 +829,7 @@ def fix_images():
         
         updated_count = cur.rowcount
         conn.commit()
+        invalidate_candidates_cache()
         cur.close()
         conn.close()
         
@@ -560,6 +838,7 @@ def fix_images():
             'message': f'{updated_count} chemins d\'images corrigés'
         }), 200
     except Exception as e:
+        logger.exception("Erreur dans fix_images")
         return jsonify({'error': str(e)}), 500
 
 # ========== ROUTES POUR LES IMAGES ==========
@@ -571,33 +850,37 @@ def serve_image(filename):
         original_filename = filename
         if filename.startswith('Photo/'):
             filename = filename[6:]  # Enlève 'Photo/'
-            print(f"🔄 Correction chemin: {original_filename} -> {filename}")
-        
-        # Chemin absolu
-        base_dir = Path(__file__).parent.absolute()
-        photo_dir = base_dir / 'static' / 'photo'
-        file_path = photo_dir / filename
-        
-        if not file_path.exists():
-            # Essayer aussi avec différentes variations
-            variations = [
-                filename,
-                filename.lower(),
-                filename.upper(),
-                filename.replace('_', ' '),
-                filename.replace(' ', '_')
-            ]
-            
+            logger.debug("Correction chemin", extra={'fields': {'original': original_filename, 'filename': filename}})
+        
+        # Essayer aussi avec différentes variations
+        variations = [
+            filename,
+            filename.lower(),
+            filename.upper(),
+            filename.replace('_', ' '),
+            filename.replace(' ', '_')
+        ]
+        
+        # Résolution via le manifeste préchargé, puis sur le disque en repli
+        manifest = _image_manifest if _image_manifest is not None else load_image_manifest()
+        file_path = None
+        
+        for var in variations:
+            if var in manifest:
+                file_path = PHOTO_DIR / var
+                break
+        else:
             for var in variations:
-                test_path = photo_dir / var
-                if test_path.exists():
-                    file_path = test_path
-                    filename = var
-                    print(f"🔄 Trouvé avec variation: {var}")
+                file_path = find_photo_on_disk(var)
+                if file_path:
                     break
         
-        if not file_path.exists():
-            print(f"❌ Image non trouvée: {filename}")
+        if file_path and var != filename:
+            logger.debug("Trouvé avec variation", extra={'fields': {'filename': var}})
+            filename = var
+        
+        if not file_path:
+            logger.warning("Image non trouvée", extra={'fields': {'filename': filename}})
             # Retourner une image par défaut (silhouette)
             from flask import Response
             import base64
@@ -623,7 +906,7 @@ def serve_image(filename):
         )
         
     except Exception as e:
-        print(f"❌ Erreur image {filename}: {str(e)}")
+        logger.exception("Erreur image", extra={'fields': {'filename': filename}})
         return jsonify({'error': str(e), 'filename': filename}), 500
 
 # Routes de compatibilité pour anciens chemins
@@ -643,37 +926,35 @@ def serve_static(path):
 
 # ========== DÉMARRAGE DE L'APPLICATION ==========
 if __name__ == '__main__':
-    print("🚀 Démarrage de l'application Miss & Mister AHN 2025...")
-    print(f"📁 Dossier courant: {Path(__file__).parent.absolute()}")
-    print(f"⏰ Date limite des votes: {VOTE_DEADLINE}")
+    logger.info("Démarrage de l'application Miss & Mister AHN 2025...")
+    logger.info("Configuration", extra={'fields': {
+        'current_dir': str(Path(__file__).parent.absolute()),
+        'deadline': VOTE_DEADLINE.isoformat(),
+    }})
     
     # Vérifier la structure
     base_dir = Path(__file__).parent.absolute()
     static_dir = base_dir / 'static'
     photo_dir = static_dir / 'photo'
     
-    print(f"📁 Static dir: {static_dir} - Existe: {static_dir.exists()}")
-    print(f"📁 Photo dir: {photo_dir} - Existe: {photo_dir.exists()}")
+    logger.info("Dossiers statiques", extra={'fields': {
+        'static_dir': str(static_dir), 'static_exists': static_dir.exists(),
+        'photo_dir': str(photo_dir), 'photo_exists': photo_dir.exists(),
+    }})
     
     if photo_dir.exists():
         images = [f for f in os.listdir(photo_dir) if f.lower().endswith(('.jpg', '.jpeg', '.png', '.gif'))]
-        print(f"📸 Images trouvées: {len(images)}")
-        if images:
-            print(f"   Exemples: {images[:3]}...")
+        logger.info("Images trouvées", extra={'fields': {'count': len(images), 'examples': images[:3]}})
     
-    # Initialiser la base
-    try:
-        init_database()
-    except Exception as e:
-        print(f"⚠️ Note: {e}")
+    # Migrations et préchauffage des caches
+    bootstrap()
 
     port = int(os.environ.get('PORT', 5000))
-    print(f"🌐 Serveur démarré sur http://localhost:{port}")
-    print(f"🔗 Test images: http://localhost:{port}/static/photo/miss_1.jpg")
+    logger.info("Serveur démarré", extra={'fields': {'url': f"http://localhost:{port}"}})
     app.run(host='0.0.0.0', port=port, debug=True)
 else:
-    print("🚀 Application chargée en production...")
-    try:
-        init_database()
-    except Exception as e:
-        print(f"⚠️ Note: {e}")
+    # Avec preload_app (gunicorn.conf.py), ce bloc s'exécute une seule fois dans
+    # le processus maître avant le fork : les workers héritent du schéma migré
+    # et des caches chauds.
+    logger.info("Application chargée en production...")
+    bootstrap()
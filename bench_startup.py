@@ -0,0 +1,144 @@
+"""Benchmark du temps de démarrage d'un worker.
+
+Usage : python bench_startup.py [--runs N] [--workers N]
+
+Nécessite DATABASE_URL, qui doit pointer vers une base de test : le script
+applique les migrations et rejoue les étapes du schéma (CREATE INDEX compris).
+
+Mesures :
+- ancienne initialisation (toutes les étapes rejouées) contre le chemin rapide
+  des migrations versionnées, en processus ;
+- import à froid de app.py dans un nouveau processus (schéma déjà à jour) ;
+- démarrage de gunicorn jusqu'à ce que tous les workers soient prêts, avec
+  GUNICORN_PRELOAD=0 puis GUNICORN_PRELOAD=1.
+"""
+import os
+import sys
+
+# Vérifier avant d'importer app : l'import exécute bootstrap(), et app.py
+# se rabat sinon sur la base de production.
+if not os.environ.get('DATABASE_URL'):
+    sys.exit("DATABASE_URL doit être défini (base de test) pour lancer ce benchmark")
+
+import argparse
+import queue
+import shutil
+import socket
+import statistics
+import subprocess
+import threading
+import time
+from pathlib import Path
+
+import psycopg
+from psycopg.rows import dict_row
+
+import app
+
+BASE_DIR = Path(__file__).parent.absolute()
+
+
+def time_call(func, runs):
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def replay_all_migrations():
+    """Équivalent de l'ancien init_database() : tout rejouer, sans rien conserver"""
+    with psycopg.connect(app.DATABASE_URL, row_factory=dict_row) as conn:
+        cur = conn.cursor()
+        for _, _, statements in app.MIGRATIONS:
+            for statement in statements:
+                cur.execute(statement)
+        conn.rollback()
+
+
+def cold_candidates():
+    app.invalidate_candidates_cache()
+    app.get_cached_candidates()
+
+
+def run_python(code):
+    subprocess.run([sys.executable, '-c', code], check=True, cwd=BASE_DIR,
+                   stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+
+def import_app():
+    run_python('import app')
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def boot_gunicorn(preload, workers, timeout=120):
+    """Temps jusqu'à ce que tous les workers aient démarré et l'app soit prête"""
+    env = dict(os.environ, GUNICORN_PRELOAD='1' if preload else '0', LOG_LEVEL='INFO')
+    command = ['gunicorn', 'app:app', '--bind', f'127.0.0.1:{free_port()}', '--workers', str(workers)]
+    # Avec preload, bootstrap() tourne une fois dans le maître ; sinon une fois par worker
+    expected_bootstraps = 1 if preload else workers
+
+    start = time.perf_counter()
+    process = subprocess.Popen(command, cwd=BASE_DIR, env=env, text=True,
+                               stdout=subprocess.PIPE, stderr=subprocess.STDOUT)
+    lines = queue.Queue()
+    reader = threading.Thread(target=lambda: [lines.put(line) for line in process.stdout], daemon=True)
+    reader.start()
+
+    booted = bootstraps = 0
+    try:
+        while booted < workers or bootstraps < expected_bootstraps:
+            remaining = timeout - (time.perf_counter() - start)
+            if remaining <= 0:
+                raise RuntimeError("gunicorn n'a pas démarré à temps")
+            try:
+                line = lines.get(timeout=remaining)
+            except queue.Empty:
+                continue
+            if 'Booting worker' in line:
+                booted += 1
+            elif 'Démarrage terminé' in line:
+                bootstraps += 1
+        return time.perf_counter() - start
+    finally:
+        process.terminate()
+        process.wait()
+
+
+def report(label, timings):
+    print(f"{label:<50} médiane {statistics.median(timings) * 1000:9.2f} ms"
+          f"   min {min(timings) * 1000:9.2f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--runs', type=int, default=10)
+    parser.add_argument('--workers', type=int, default=2)
+    args = parser.parse_args()
+
+    app.run_migrations()
+
+    report("Ancienne initialisation (tout rejouer)", time_call(replay_all_migrations, args.runs))
+    report("Migrations versionnées (schéma à jour)", time_call(app.run_migrations, args.runs))
+    report("Manifeste des images", time_call(app.load_image_manifest, args.runs))
+    report("Liste des candidats (cache froid)", time_call(cold_candidates, args.runs))
+    report("Liste des candidats (cache chaud)", time_call(app.get_cached_candidates, args.runs))
+    report("Import à froid de app.py", time_call(import_app, args.runs))
+
+    if shutil.which('gunicorn') is None:
+        print("gunicorn introuvable : démarrage des workers non mesuré")
+        return
+    for preload in (False, True):
+        label = f"Démarrage gunicorn, {args.workers} workers, preload={int(preload)}"
+        # Valeurs renvoyées par boot_gunicorn : l'arrêt de gunicorn n'est pas compté
+        report(label, [boot_gunicorn(preload, args.workers) for _ in range(args.runs)])
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,18 @@
+# Configuration gunicorn, lue automatiquement depuis le répertoire de lancement
+# (`gunicorn app:app`).
+import os
+
+# Mode preload : le processus maître importe app.py une seule fois, ce qui
+# applique les migrations et préchauffe les caches avant de forker les
+# workers. GUNICORN_PRELOAD=0 rétablit l'import dans chaque worker.
+preload_app = os.getenv('GUNICORN_PRELOAD', '1') == '1'
+
+
+def post_worker_init(worker):
+    """Réessaie les migrations dans le worker si le maître a échoué
+
+    Un nouvel échec empêche le worker de démarrer ; gunicorn s'arrête alors au
+    lieu de servir du trafic sur un schéma non migré.
+    """
+    import app
+    app.ensure_schema()